@@ -8,6 +8,12 @@
 """
 
 import abc
+import asyncio
+import collections
+import functools
+import sys
+import threading
+import types
 
 class Lottus(object):
     """
@@ -20,8 +26,16 @@ class Lottus(object):
         - session_manager: the session manager 
         - window_cache: the cache management for the windows
         - mapped_windows: the windows that were mapped with the 'window' decorator
+        - session_cache_size: the maximum number of sessions kept in memory, 0 disables the session cache
+        - max_batch_size: the maximum number of requests processed together by `process_request_async`
+        - max_batch_wait: the maximum time, in seconds, a request waits for its batch to fill up
+
+        Registered windows must not be edited in place once requests are being served. Replacing a window,
+        its options or its required is picked up on the next request, any change made inside the options
+        list or inside an option must be followed by a call to `refresh_window`.
     """
-    def __init__(self, initial_window, windows, session_manager, window_cache = None):
+    def __init__(self, initial_window, windows, session_manager, window_cache = None, session_cache_size = 0,
+                 max_batch_size = 64, max_batch_wait = 0.005):
         """
             Initializes the Lottus application
 
@@ -30,12 +44,32 @@ class Lottus(object):
             :param windows `dict`: a dictionary of windows
             :param session_manager `SessionManager`: the session manager of Lottus
             :param window_cache `WindowCache`: the cache management for the windows
+            :param session_cache_size `int`: the maximum number of sessions kept in memory in front of
+            the session manager. The cache is write-through, so it must only be enabled when this
+            application is the only one writing the sessions. 0 disables it
+            :param max_batch_size `int`: the maximum number of requests processed together by
+            `process_request_async`
+            :param max_batch_wait `float`: the maximum time, in seconds, `process_request_async` waits
+            for more requests before processing a batch
         """
         self.initial_window = initial_window
         self.windows = windows
         self.session_manager = session_manager
         self.window_cache = window_cache
+        self._session_get = session_manager.get
+        self._session_save = session_manager.save
+        self._cache_get_pair = window_cache.get_pair if window_cache is not None else None
+        self._cache_window = window_cache.cache if window_cache is not None else None
         self.mapped_windows = {}
+        self._mapped_get = self.mapped_windows.get
+        self.session_cache_size = session_cache_size
+        self.max_batch_size = max_batch_size
+        self.max_batch_wait = max_batch_wait
+        self._views = {}
+        self._session_cache = collections.OrderedDict()
+        self._session_cache_lock = threading.Lock()
+        self._batch_queue = None
+        self._batch_task = None
 
     def process_request(self, request):
         """
@@ -43,29 +77,256 @@ class Lottus(object):
             :param request: a `dict` request
         """
         session_nr = request['session_nr']
-        request_str = request['request_str']
         cell_nr = request['cell_nr']
 
-        session = self.session_manager.get(session_nr, cell_nr)
+        session = self._get_session(session_nr, cell_nr)
+
+        try:
+            window, session = self._process_session(session, request)
+            self._save_session(session, session_nr, cell_nr)
+        except Exception:
+            # the cached session may have been changed in place, the next request must reload it
+            self._evict_session((session_nr, cell_nr))
+            raise
+
+        return window
+
+    async def process_request_async(self, request):
+        """
+            Processes the request together with the other requests received within `max_batch_wait`
+            seconds and returns the window generated. The sessions of a batch are fetched with a single
+            `SessionManager.get_many` and saved with a single `SessionManager.save_many`. Batches are
+            processed in the default executor, so the session manager, the window cache and the window
+            processors are called off the event loop and must be thread-safe
+            :param request: a `dict` request
+        """
+        loop = asyncio.get_running_loop()
+
+        if self._batch_task is None or self._batch_task.get_loop() is not loop or self._batch_task.done():
+            self._batch_queue = asyncio.Queue()
+            self._batch_task = loop.create_task(self._run_batches(self._batch_queue))
+
+        future = loop.create_future()
+        self._batch_queue.put_nowait((request, future))
+
+        return await future
 
+    async def _run_batches(self, queue):
+        """
+            Collects the requests of `process_request_async` into batches and processes them
+            :param queue `asyncio.Queue`: the queue of (request, future) pairs
+        """
+        loop = asyncio.get_running_loop()
+
+        while True:
+            batch = [await queue.get()]
+            deadline = loop.time() + self.max_batch_wait
+
+            while len(batch) < self.max_batch_size:
+                timeout = deadline - loop.time()
+
+                if timeout <= 0:
+                    break
+
+                try:
+                    batch.append(await asyncio.wait_for(queue.get(), timeout))
+                except asyncio.TimeoutError:
+                    break
+
+            try:
+                outcomes = await loop.run_in_executor(None, self._process_batch, batch)
+            except Exception as e:
+                outcomes = [(future, None, e) for request, future in batch]
+
+            for future, window, error in outcomes:
+                if future.done():
+                    continue
+
+                if error is not None:
+                    future.set_exception(error)
+                else:
+                    future.set_result(window)
+
+    def _process_batch(self, batch):
+        """
+            Processes a batch of requests and returns a (future, window, error) `tuple` for each request,
+            error being None when the request succeeded. Runs in the default executor, off the event loop
+            :param batch `list`: the (request, future) pairs to be processed
+        """
+        keys = [(request['session_nr'], request['cell_nr']) for request, future in batch]
+
+        try:
+            sessions = self._get_sessions(keys)
+        except Exception as e:
+            return [(future, None, e) for request, future in batch]
+
+        updated = {}
+        outcomes = []
+
+        for (request, future), key in zip(batch, keys):
+            session = updated[key] if key in updated else sessions.get(key)
+
+            try:
+                window, updated[key] = self._process_session(session, request)
+            except Exception as e:
+                self._evict_session(key)
+                outcomes.append((future, None, e))
+            else:
+                outcomes.append((future, window, None))
+
+        try:
+            self._save_sessions(updated)
+        except Exception as e:
+            for key in updated:
+                self._evict_session(key)
+
+            return [(future, None, error if error is not None else e) for future, window, error in outcomes]
+
+        return outcomes
+
+    def _process_session(self, session, request):
+        """
+            Processes the request upon the session and returns the window generated and the new session.
+            A new session is created if session is None
+            :param session `dict`: the session of the request, None if it's the first request
+            :param request `dict`: the actual request
+        """
         window = None
 
         if session is None:
-            session = create_session(session_nr, cell_nr, self.initial_window)
-
-            if self.initial_window in self.mapped_windows:
-                window, session = self.get_mapped_window(self.initial_window, session, request)
-                if self.window_cache:
-                    self.window_cache.cache(window, session_nr)
+            session_nr = request['session_nr']
+            session = create_session(session_nr, request['cell_nr'], self.initial_window)
+            processor = self._mapped_get(self.initial_window)
+
+            if processor is not None:
+                window, session = processor(session, request)
+                if self._cache_window is not None:
+                    self._cache_window(window, session_nr)
             else:
                 window = self.get_window(self.initial_window)
         else:
             window, session = self.process_window(session, request)
             
         session['window'] = window['name']
-        self.session_manager.save(session)
 
-        return window
+        return window, session
+
+    def finish_session(self, session):
+        """
+            Terminates the session through the session manager and drops it from the session cache
+            :param session `dict`: the session to be terminated
+        """
+        self._evict_session((session['session_nr'], session['cell_nr']))
+        self.session_manager.finish(session)
+
+    def _get_session(self, session_nr, cell_nr):
+        """
+            Returns the session from the session cache, falling back to the session manager
+            :param session_nr: the session identifier
+            :param cell_nr: the cell identifier
+        """
+        if not self.session_cache_size:
+            return self._session_get(session_nr, cell_nr)
+
+        key = (session_nr, cell_nr)
+        session = self._cached_session(key)
+
+        if session is not None:
+            return session
+
+        session = self._session_get(session_nr, cell_nr)
+
+        if session is not None:
+            self._cache_session(key, session)
+
+        return session
+
+    def _get_sessions(self, keys):
+        """
+            Returns a `dict` with the session of each (session_nr, cell_nr) key, using the session cache
+            and a single `SessionManager.get_many` for the sessions that aren't cached
+            :param keys `list`: the (session_nr, cell_nr) keys of the sessions
+        """
+        sessions = {}
+        missing = []
+
+        for key in dict.fromkeys(keys):
+            session = self._cached_session(key) if self.session_cache_size else None
+
+            if session is not None:
+                sessions[key] = session
+            else:
+                missing.append(key)
+
+        if missing:
+            for key, session in zip(missing, self.session_manager.get_many(missing)):
+                sessions[key] = session
+
+                if session is not None and self.session_cache_size:
+                    self._cache_session(key, session)
+
+        return sessions
+
+    def _save_session(self, session, session_nr, cell_nr):
+        """
+            Saves the session through the session manager and keeps it in the session cache
+            :param session `dict`: the session to be saved
+            :param session_nr: the session identifier
+            :param cell_nr: the cell identifier
+        """
+        self._session_save(session)
+
+        if self.session_cache_size:
+            self._cache_session((session_nr, cell_nr), session)
+
+    def _save_sessions(self, sessions):
+        """
+            Saves the sessions with a single `SessionManager.save_many` and keeps them in the session cache
+            :param sessions `dict`: the sessions to be saved, by (session_nr, cell_nr) key
+        """
+        if not sessions:
+            return
+
+        self.session_manager.save_many(list(sessions.values()))
+
+        if self.session_cache_size:
+            for key, session in sessions.items():
+                self._cache_session(key, session)
+
+    def _cached_session(self, key):
+        """
+            Returns the session from the session cache, marking it as the most recently used.
+            None if the session isn't cached
+            :param key `tuple`: the (session_nr, cell_nr) of the session
+        """
+        with self._session_cache_lock:
+            session = self._session_cache.get(key)
+
+            if session is not None:
+                self._session_cache.move_to_end(key)
+
+        return session
+
+    def _cache_session(self, key, session):
+        """
+            Adds the session to the session cache, evicting the least recently used sessions
+            :param key `tuple`: the (session_nr, cell_nr) of the session
+            :param session `dict`: the session to be cached
+        """
+        with self._session_cache_lock:
+            self._session_cache[key] = session
+            self._session_cache.move_to_end(key)
+
+            while len(self._session_cache) > self.session_cache_size:
+                self._session_cache.popitem(last=False)
+
+    def _evict_session(self, key):
+        """
+            Drops the session from the session cache, if it's cached
+            :param key `tuple`: the (session_nr, cell_nr) of the session
+        """
+        with self._session_cache_lock:
+            self._session_cache.pop(key, None)
 
     def process_window(self, session, request):
         """
@@ -74,75 +335,144 @@ class Lottus(object):
             :param request `dict`: the actual request
         """
         actual_window_name = session['window']
-        window = None
+        session_nr = request['session_nr']
+        request_str = request['request_str']
+        mapped_get = self._mapped_get
         actual_window = None
 
-        if self.window_cache is not None:
-            actual_window = self.window_cache.get(actual_window_name, request['session_nr'])
+        if self._cache_get_pair is not None:
+            session_window, global_window = self._cache_get_pair(actual_window_name, session_nr)
+            actual_window = session_window if session_window is not None else global_window
 
-            if actual_window is None:
-                actual_window = self.window_cache.get(actual_window_name)
+        if actual_window is None:
+            processor = mapped_get(actual_window_name)
 
-        if actual_window is None and actual_window_name in self.mapped_windows:
-            actual_window, old_session = self.get_mapped_window(actual_window_name, session, request)
+            if processor is not None:
+                actual_window, old_session = processor(session, request)
 
         if actual_window is None:
             actual_window = self.get_window(actual_window_name)
 
-        options = actual_window['options']
-        window_type = actual_window['type']
-        active = actual_window['active']
-        required = actual_window['required'] if 'required' in actual_window else None
+        view = self.get_window_view(actual_window)
 
-        session_nr = request['session_nr']
-        request_str = request['request_str']
-        cell_nr = request['cell_nr']
+        return getattr(self, view.handler)(view, session, request, session_nr, request_str)
 
-        if required is not None:
-            if 'window' in required:
-                if 'in_options' in required and required['in_options'] == True:
-                    selected_option = self.get_selected_option(actual_window, request)
-
-                    if selected_option:
-                        if 'value' in selected_option:
-                            session['variables'][required['var']] = selected_option['value']
-                        else:
-                            session['variables'][required['var']] = selected_option['option']
-                    else:
-                        actual_window['message'] = "Please select a valid option"
-                        window = actual_window
-                else:
-                    session['variables'][required['var']] = request_str
-                
-                window = self.get_window(required['window'])
-            else:
-                create_error_window("Error processing your request")
+    def _process_options(self, view, session, request, session_nr, request_str):
+        """
+            Handles the request for a window without required: moves to the window of the selected option
+            :param view `WindowView`: the view of the actual window
+            :param session `dict`: the session of the current request
+            :param request `dict`: the actual request
+            :param session_nr: the session identifier of the request
+            :param request_str: the request_str of the request
+        """
+        selected_option = self.get_selected_option(view.window, request_str)
+
+        if selected_option is None:
+            return {**view.window, 'message': "Please select a valid option"}, session
+
+        if view.targets is not None and selected_option['option'] in view.targets:
+            processor = view.targets[selected_option['option']]
         else:
-            selected_option = self.get_selected_option(actual_window, request)
+            processor = self._mapped_get(selected_option['window'])
 
-            if selected_option is None:
-                actual_window['message'] = "Please select a valid option"
-                window = actual_window
-            else:
-                if selected_option['window'] in self.mapped_windows:
-                    window, session = self.get_mapped_window(selected_option['window'], session, request)
+        if processor is not None:
+            window, session = processor(session, request)
 
-                    if self.window_cache is not None:
-                        self.window_cache.cache(window, session_nr)
-                else:
-                    window = self.get_window(selected_option['window'])
+            if self._cache_window is not None:
+                self._cache_window(window, session_nr)
+        else:
+            window = self.get_window(selected_option['window'])
 
         return window, session
 
-    def get_selected_option(self, window, request):
+    def _process_required_option(self, view, session, request, session_nr, request_str):
+        """
+            Handles the request for a window whose required variable must be one of the options:
+            stores the selected option in the session and moves to the required window. An invalid option
+            shows the window again
+            :param view `WindowView`: the view of the actual window
+            :param session `dict`: the session of the current request
+            :param request `dict`: the actual request
+            :param session_nr: the session identifier of the request
+            :param request_str: the request_str of the request
+        """
+        required = view.required
+        selected_option = self.get_selected_option(view.window, request_str)
+
+        if not selected_option:
+            return {**view.window, 'message': "Please select a valid option"}, session
+
+        if 'value' in selected_option:
+            session['variables'][required['var']] = selected_option['value']
+        else:
+            session['variables'][required['var']] = selected_option['option']
+
+        return self.get_window(required['window']), session
+
+    def _process_required_input(self, view, session, request, session_nr, request_str):
+        """
+            Handles the request for a window whose required variable is the request itself:
+            stores the request_str in the session and moves to the required window
+            :param view `WindowView`: the view of the actual window
+            :param session `dict`: the session of the current request
+            :param request `dict`: the actual request
+            :param session_nr: the session identifier of the request
+            :param request_str: the request_str of the request
+        """
+        required = view.required
+        session['variables'][required['var']] = request_str
+
+        return self.get_window(required['window']), session
+
+    def _process_invalid_required(self, view, session, request, session_nr, request_str):
+        """
+            Handles the request for a window whose required doesn't point to any window: returns the error window
+            :param view `WindowView`: the view of the actual window
+            :param session `dict`: the session of the current request
+            :param request `dict`: the actual request
+            :param session_nr: the session identifier of the request
+            :param request_str: the request_str of the request
+        """
+        return create_error_window("Error processing your request"), session
+
+    def get_selected_option(self, window, request_str):
         """
             Returns the selected option based on current request. None if the selected option is invalid
             :param window `dict`: the window upon which the option must be selected
-            :param request `dict`: the request with the choice
+            :param request_str: the request_str of the request, with the choice
+        """
+        return self.get_window_view(window).select(request_str)
+
+    def get_window_view(self, window):
         """
-        options = window['options']
+            Returns the `WindowView` of the window. Views of registered windows are built once
+            and reused by the following requests until the window, its options or its required are
+            replaced or `refresh_window` is called, any other window gets a fresh view
+            :param window `dict`: the window whose view must be returned
+        """
+        window_name = window['name']
+
+        if self.windows.get(window_name) is not window:
+            return WindowView(window)
+
+        view = self._views.get(window_name)
 
-        return next((s for s in options if s['option'] == request['request_str']), None)
+        if view is None or view.is_stale(window):
+            view = self._views[window_name] = WindowView(window, indexed=True)
+
+            if self.finalized:
+                view.resolve(self._mapped_get)
+
+        return view
+
+    def refresh_window(self, window_name):
+        """
+            Drops the view built for the registered window, so that changes made inside its options
+            are picked up by the next request
+            :param window_name `str`: the name of the window that was changed
+        """
+        self._views.pop(window_name, None)
 
     def get_window(self, window_name):
         """
@@ -150,20 +480,22 @@ class Lottus(object):
             :param window_name `str`: the name of the window that must be returned. 
             None if window couldn't be found
         """
-        return self.windows[window_name] if window_name in self.windows else None
+        return self.windows.get(window_name)
         
     def get_mapped_window(self, window_name, session, request):
         """
-            Returns the window and a session from the mapped_window `dict`
+            Returns the window and a session from the mapped_window `dict`. The window is None if
+            no processor was mapped to window_name
             :param window_name `str`: the name of the window that must be returned.
             :param session `dict`: the current session that will be passed to the window's processor
             :param request `dict`: the current request that will be passed to the window's processor
         """
-        if window_name in self.mapped_windows:
-            processor = self.mapped_windows[window_name]
-            window, session = processor(session, request)
+        processor = self._mapped_get(window_name)
 
-        return window, session
+        if processor is None:
+            return None, session
+
+        return processor(session, request)
 
     def window(self, window_name):
         """
@@ -180,10 +512,112 @@ class Lottus(object):
             :param window_name `str`: the window_name
             :param f `function`: the function to be mapped to window_name
         """
+        if self.finalized:
+            raise RuntimeError("Cannot map window '%s' after the application was finalized" % window_name)
+
         self.mapped_windows[window_name] = f
 
+    @property
+    def finalized(self):
+        """
+            Indicates whether the mapped windows were frozen by `finalize`
+        """
+        return isinstance(self.mapped_windows, types.MappingProxyType)
 
-class WindowCache(object):
+    def finalize(self):
+        """
+            Freezes the mapped windows and resolves the processor mapped to the window that each option of the
+            registered windows points to. Should be called once every window was mapped, before serving
+            requests. Mapping a window after the application was finalized raises `RuntimeError`
+        """
+        if not self.finalized:
+            self._mapped_get = self.mapped_windows.get
+            self.mapped_windows = types.MappingProxyType(self.mapped_windows)
+
+        for window in self.windows.values():
+            self.get_window_view(window).resolve(self._mapped_get)
+
+
+class WindowView(object):
+    """
+        Represents the fields of a window that lottus reads while processing a request,
+        extracted once so that the request path doesn't have to look them up in the window `dict`
+
+        Attributes
+        ----------
+        - window: the window `dict` the view was built from
+        - options: the options of the window
+        - option_index: a `dict` that maps each option value to its option, None if not indexed
+        - required: the required `dict` of the window, None if the window has none
+        - targets: a `dict` that maps each option value to the processor mapped to the window the option
+        points to (None if the window isn't mapped), None until the view is resolved
+        - handler: the name of the `Lottus` method that handles the requests for the window, chosen once
+        from the required of the window
+    """
+    __slots__ = ('window', 'options', 'option_index', 'required', 'targets', 'handler')
+
+    def __init__(self, window, indexed=False):
+        """
+            Initializes the view of the window
+            :param window `dict`: the window
+            :param indexed `bool`: indicates whether the options must be indexed by their value
+        """
+        self.window = window
+        self.options = window.get('options') or ()
+        self.required = window.get('required')
+        self.option_index = None
+        self.targets = None
+
+        required = self.required
+
+        if required is None:
+            self.handler = '_process_options'
+        elif 'window' not in required:
+            self.handler = '_process_invalid_required'
+        elif required.get('in_options') == True:
+            self.handler = '_process_required_option'
+        else:
+            self.handler = '_process_required_input'
+
+        if indexed:
+            # reversed so that the first option wins on duplicates, like the linear scan does
+            self.option_index = {s['option']: s for s in reversed(self.options)}
+
+    def is_stale(self, window):
+        """
+            Indicates whether the view no longer matches the window: the window, its options or its required
+            were replaced. Changes made inside the options list aren't detected
+            :param window `dict`: the window the view is expected to match
+        """
+        return (self.window is not window or self.options is not (window.get('options') or ())
+                or self.required is not window.get('required'))
+
+    def select(self, value):
+        """
+            Returns the option whose value is `value`. None if there is no such option
+            :param value: the value of the option, usually the request_str of the request
+        """
+        if self.option_index is not None:
+            return self.option_index.get(value)
+
+        for s in self.options:
+            if s['option'] == value:
+                return s
+
+        return None
+
+    def resolve(self, get_processor):
+        """
+            Resolves the processor mapped to the window each option points to. Only the processors are
+            resolved, they can't change once the mapped windows are frozen, the windows themselves are
+            still looked up by name so that replaced windows are picked up. Only indexed views can be resolved
+            :param get_processor `function`: returns the processor mapped to a window name, or None
+        """
+        if self.option_index is not None:
+            self.targets = {value: get_processor(s['window']) for value, s in self.option_index.items()}
+
+
+class WindowCache(abc.ABC):
     """
         Represents the cache object for lottus windows
     """
@@ -207,18 +641,32 @@ class WindowCache(object):
         """
         pass
 
-    @abc.abstractmethod
+    def get_pair(self, window_name, session_nr):
+        """
+            Returns the window cached for the session_nr and the window cached for every session, as a
+            `tuple`. The second one isn't needed, and may be None, when the first one was found.
+            Override it to fetch both in a single round trip
+            :param window_name `str`: the name of the window that must be retrieved from the cache
+            :param session_nr: the identifier of the session
+        """
+        session_window = self.get(window_name, session_nr)
+
+        if session_window is not None:
+            return session_window, None
+
+        return None, self.get(window_name)
+
     def delete(self, session_nr, window_name = None):
         """
             Deletes all cached windows of the session_nr. If window_name is provided only the window
-            with name window_name will be deleted.
+            with name window_name will be deleted. Lottus never calls it, so it does nothing by default.
             :param session_nr: the identifier of the session
             :param window_name `str`: the name of the window to be deleted
         """
         pass
 
 
-class SessionManager(object):
+class SessionManager(abc.ABC):
     """
         Represents the session manager for lottus session
     """
@@ -239,14 +687,30 @@ class SessionManager(object):
         """
         pass
 
-    @abc.abstractmethod
     def finish(self, session):
         """
-            Terminates the session
+            Terminates the session. Lottus only calls it from `Lottus.finish_session`, so it does
+            nothing by default.
             :param session `dict`: the session to be saved
         """
         pass
 
+    def get_many(self, keys):
+        """
+            Returns the sessions of the keys, in the same order. None for the sessions that don't exist.
+            Override it to fetch all the sessions in a single round trip
+            :param keys `list`: the (session_nr, cell_nr) keys of the sessions
+        """
+        return [self.get(session_nr, cell_nr) for session_nr, cell_nr in keys]
+
+    def save_many(self, sessions):
+        """
+            Saves the sessions. Override it to save all the sessions in a single round trip
+            :param sessions `list`: the sessions to be saved
+        """
+        for session in sessions:
+            self.save(session)
+
 def create_session(session_nr, cell_nr, window_name = None, variables = None):
     """
         Returns a session `dict` to be used by lottus
@@ -301,6 +765,9 @@ def create_option(option, display, window, active=True):
         :param window `str`: the name of the window that this option points to
         :param active `bool`: indicates wheter the option will be showed to the client
     """
+    if isinstance(option, str):
+        option = sys.intern(option)
+
     return {
         'option': option,
         'display': display,
@@ -325,9 +792,10 @@ def create_required(variable, window, in_options=False, var_type='numeric', var_
         'length': var_length
     }
 
+@functools.lru_cache(maxsize=64)
 def create_error_window(message):
     """
-        Returns an error window
+        Returns an error window. The window is built once per message and shared, so it must not be modified
         :param message `str`: the message to be showed to the client
     """
     return create_window(name='ERROR', message=message, title='ERROR', window_type='MESSAGE')
@@ -336,11 +804,14 @@ def create_error_window(message):
 def window_response(window):
     """
     """
+    if not window:
+        return None
+
     return {
-        'message': window['message'] if 'message' in window else None,
-        'title': window['title'] if 'title' in window else None,
-        'options': [option_response(x) for x in window['options']] if 'options' in window else []
-    } if window else None
+        'message': window.get('message'),
+        'title': window.get('title'),
+        'options': [option_response(x) for x in window.get('options') or ()]
+    }
 
 def option_response(option):
     """
@@ -168,6 +168,14 @@ def test_cache_has_not_portuguese_menu():
     with pytest.raises(KeyError):
         cache.windows['PORTUGUESE']
 
+def test_window_cache_must_implement_get_and_cache():
+    class IncompleteWindowCache(WindowCache):
+        def get(self, window_name, session_nr=None):
+            return None
+
+    with pytest.raises(TypeError):
+        IncompleteWindowCache()
+
 
 if __name__ == '__main__':
     app = create_lottus_app()
@@ -1,5 +1,8 @@
 from lottus import *
+import asyncio
 import random
+import time
+import pytest
 
 windows = {
     "INITIAL": {
@@ -30,6 +33,35 @@ windows = {
     }
 }
 
+class DictSessionManager(SessionManager):
+    def __init__(self, copy_sessions=False, delay=0, get_failures=0):
+        self._sessions = {}
+        self.copy_sessions = copy_sessions
+        self.delay = delay
+        self.get_failures = get_failures
+        self.save_failures = 0
+        self.gets = 0
+        self.batches = []
+
+    def get(self, session_nr, cell_nr):
+        self.gets += 1
+        session = self._sessions.get((session_nr, cell_nr))
+        return dict(session) if self.copy_sessions and session is not None else session
+
+    def save(self, session):
+        if self.save_failures:
+            self.save_failures -= 1
+            raise IOError("session store unavailable")
+        self._sessions[(session['session_nr'], session['cell_nr'])] = dict(session) if self.copy_sessions else session
+
+    def get_many(self, keys):
+        self.batches.append(keys)
+        time.sleep(self.delay)
+        if self.get_failures:
+            self.get_failures -= 1
+            raise IOError("session store unavailable")
+        return [self.get(session_nr, cell_nr) for session_nr, cell_nr in keys]
+
 def create_lottus_app():
     class InMemorySessionManager(SessionManager):
         def __init__(self):
@@ -114,4 +146,300 @@ def test_must_return_error_menu():
 
     window = app.process_request(create_request(session_nr=sessio_nr, cell_nr=cell_nr, request_str="3"))
 
-    assert window['name'] == 'INITIAL'
\ No newline at end of file
+    assert window['name'] == 'INITIAL'
+    assert window['message'] == 'Please select a valid option'
+    assert windows['INITIAL']['message'] == 'Please select your languange of choice'
+
+def test_option_index_must_follow_options():
+    window = {
+        "name": "MENU",
+        "title": "Menu",
+        "message": "Please select one of the options",
+        "options": [
+            {"option": "1", "display": "First", "window": "FIRST", "active": True},
+            {"option": "1", "display": "Duplicate", "window": "DUPLICATE", "active": True}
+        ],
+        "type": "FORM",
+        "active": True
+    }
+
+    app = Lottus('MENU', {'MENU': window}, DictSessionManager())
+
+    assert app.get_selected_option(window, "1")['window'] == 'FIRST'
+    assert app.get_selected_option(window, "2") is None
+
+    window['options'].append({"option": "2", "display": "Second", "window": "SECOND", "active": True})
+    app.refresh_window('MENU')
+
+    assert app.get_selected_option(window, "2")['window'] == 'SECOND'
+
+    window['options'].pop()
+    window['options'].append({"option": "4", "display": "Fourth", "window": "FOURTH", "active": True})
+    app.refresh_window('MENU')
+
+    assert app.get_selected_option(window, "2") is None
+    assert app.get_selected_option(window, "4")['window'] == 'FOURTH'
+
+    window['options'] = [{"option": "3", "display": "Third", "window": "THIRD", "active": True}]
+
+    assert app.get_selected_option(window, "1") is None
+    assert app.get_selected_option(window, "3")['window'] == 'THIRD'
+
+
+def test_finalized_app_must_serve_replaced_windows():
+    app_windows = {'INITIAL': windows['INITIAL'], 'ENGLISH': windows['ENGLISH']}
+    app = Lottus('INITIAL', app_windows, DictSessionManager())
+    app.finalize()
+
+    app_windows['ENGLISH'] = dict(windows['ENGLISH'], title="New English window")
+
+    sessio_nr = random.randint(1000000, 9999999)
+    cell_nr = '258842217064'
+
+    app.process_request(create_request(session_nr=sessio_nr, cell_nr=cell_nr, request_str=8745))
+    window = app.process_request(create_request(session_nr=sessio_nr, cell_nr=cell_nr, request_str="1"))
+
+    assert window['title'] == 'New English window'
+
+
+def test_session_cache_must_skip_session_manager():
+    session_manager = DictSessionManager()
+    app = Lottus('INITIAL', windows, session_manager, session_cache_size=10)
+
+    sessio_nr = random.randint(1000000, 9999999)
+    cell_nr = '258842217064'
+
+    app.process_request(create_request(session_nr=sessio_nr, cell_nr=cell_nr, request_str=8745))
+    window = app.process_request(create_request(session_nr=sessio_nr, cell_nr=cell_nr, request_str="1"))
+
+    assert window['name'] == 'ENGLISH'
+    assert session_manager.gets == 1
+
+
+def test_session_cache_must_drop_session_when_save_fails():
+    session_manager = DictSessionManager(copy_sessions=True)
+    app = Lottus('INITIAL', windows, session_manager, session_cache_size=10)
+
+    sessio_nr = random.randint(1000000, 9999999)
+    cell_nr = '258842217064'
+
+    app.process_request(create_request(session_nr=sessio_nr, cell_nr=cell_nr, request_str=8745))
+
+    session_manager.save_failures = 1
+
+    with pytest.raises(IOError):
+        app.process_request(create_request(session_nr=sessio_nr, cell_nr=cell_nr, request_str="1"))
+
+    window = app.process_request(create_request(session_nr=sessio_nr, cell_nr=cell_nr, request_str="1"))
+
+    assert window['name'] == 'ENGLISH'
+
+
+def test_async_requests_must_share_session_round_trips():
+    session_manager = DictSessionManager()
+    app = Lottus('INITIAL', windows, session_manager, max_batch_wait=0.05)
+
+    cell_nr = '258842217064'
+    session_nrs = random.sample(range(1000000, 9999999), 3)
+
+    async def run():
+        requests = [create_request(session_nr=nr, cell_nr=cell_nr, request_str=8745) for nr in session_nrs]
+        return await asyncio.gather(*[app.process_request_async(r) for r in requests])
+
+    result = asyncio.run(run())
+
+    assert [window['name'] for window in result] == ['INITIAL'] * 3
+    assert len(session_manager.batches) == 1
+    assert len(session_manager.batches[0]) == 3
+
+    result = asyncio.run(app.process_request_async(create_request(session_nr=session_nrs[0], cell_nr=cell_nr, request_str="1")))
+
+    assert result['name'] == 'ENGLISH'
+
+
+def test_failed_batch_must_not_stop_async_requests():
+    app = Lottus('INITIAL', windows, DictSessionManager(get_failures=1), max_batch_wait=0.05)
+    cell_nr = '258842217064'
+
+    async def run():
+        cancelled = asyncio.ensure_future(app.process_request_async(create_request(1, cell_nr, 8745)))
+        failed = asyncio.ensure_future(app.process_request_async(create_request(2, cell_nr, 8745)))
+        await asyncio.sleep(0)
+
+        batch_task = app._batch_task
+        cancelled.cancel()
+
+        with pytest.raises(IOError):
+            await asyncio.wait_for(failed, 1)
+
+        window = await asyncio.wait_for(app.process_request_async(create_request(3, cell_nr, 8745)), 1)
+
+        assert app._batch_task is batch_task
+        return window
+
+    assert asyncio.run(run())['name'] == 'INITIAL'
+
+
+def test_async_batch_must_not_block_event_loop():
+    app = Lottus('INITIAL', windows, DictSessionManager(delay=0.2), max_batch_wait=0)
+
+    async def run():
+        request = asyncio.ensure_future(app.process_request_async(create_request(1, '258842217064', 8745)))
+        ticks = 0
+
+        while not request.done():
+            await asyncio.sleep(0.01)
+            ticks += 1
+
+        return ticks, request.result()
+
+    ticks, window = asyncio.run(run())
+
+    assert window['name'] == 'INITIAL'
+    assert ticks > 5
+
+
+def test_finalized_app_must_not_map_windows():
+    app = create_lottus_app()
+    app.finalize()
+
+    with pytest.raises(RuntimeError):
+        @app.window('ENGLISH')
+        def english_window(session, request):
+            return windows['ENGLISH'], session
+
+    sessio_nr = random.randint(1000000, 9999999)
+    cell_nr = '258842217064'
+
+    app.process_request(create_request(session_nr=sessio_nr, cell_nr=cell_nr, request_str=8745))
+    window = app.process_request(create_request(session_nr=sessio_nr, cell_nr=cell_nr, request_str="2"))
+
+    assert window['name'] == 'PORTUGUESE'
+
+    sessio_nr = random.randint(1000000, 9999999)
+
+    app.process_request(create_request(session_nr=sessio_nr, cell_nr=cell_nr, request_str=8745))
+    window = app.process_request(create_request(session_nr=sessio_nr, cell_nr=cell_nr, request_str="1"))
+
+    assert window['name'] == 'ENGLISH'
+
+
+def test_error_window_must_be_reused():
+    window = create_error_window("Error processing your request")
+
+    assert window['name'] == 'ERROR'
+    assert window is create_error_window("Error processing your request")
+
+required_windows = {
+    "LANGUAGE": {
+        "name": "LANGUAGE",
+        "title": "Language",
+        "message": "Please select your languange of choice",
+        "options": [
+            {"option": "1", "display": "English", "window": "NAME", "value": "EN", "active": True},
+            {"option": "2", "display": "Portuguese", "window": "NAME", "active": True}
+        ],
+        "required": create_required("language", "NAME", in_options=True),
+        "type": "FORM",
+        "active": True
+    },
+
+    "NAME": {
+        "name": "NAME",
+        "title": "Name",
+        "message": "Please type your name",
+        "options": [],
+        "required": create_required("name", "LANGUAGE"),
+        "type": "FORM",
+        "active": True
+    },
+
+    "BROKEN": {
+        "name": "BROKEN",
+        "title": "Broken",
+        "message": "This window's required doesn't point to any window",
+        "options": [],
+        "required": {"var": "broken"},
+        "type": "FORM",
+        "active": True
+    }
+}
+
+def create_required_app(window_name, session_nr, cell_nr):
+    session_manager = DictSessionManager()
+    session_manager.save(create_session(session_nr, cell_nr, window_name, {}))
+
+    return Lottus(window_name, required_windows, session_manager), session_manager
+
+def test_required_option_must_store_option_value():
+    sessio_nr = random.randint(1000000, 9999999)
+    cell_nr = '258842217064'
+    app, session_manager = create_required_app('LANGUAGE', sessio_nr, cell_nr)
+
+    window = app.process_request(create_request(session_nr=sessio_nr, cell_nr=cell_nr, request_str="1"))
+
+    assert window['name'] == 'NAME'
+    assert session_manager.get(sessio_nr, cell_nr)['variables'] == {'language': 'EN'}
+
+def test_required_option_must_store_option_without_value():
+    sessio_nr = random.randint(1000000, 9999999)
+    cell_nr = '258842217064'
+    app, session_manager = create_required_app('LANGUAGE', sessio_nr, cell_nr)
+
+    window = app.process_request(create_request(session_nr=sessio_nr, cell_nr=cell_nr, request_str="2"))
+
+    assert window['name'] == 'NAME'
+    assert session_manager.get(sessio_nr, cell_nr)['variables'] == {'language': '2'}
+
+def test_required_input_must_store_request_str():
+    sessio_nr = random.randint(1000000, 9999999)
+    cell_nr = '258842217064'
+    app, session_manager = create_required_app('NAME', sessio_nr, cell_nr)
+
+    window = app.process_request(create_request(session_nr=sessio_nr, cell_nr=cell_nr, request_str="Ben"))
+
+    assert window['name'] == 'LANGUAGE'
+    assert session_manager.get(sessio_nr, cell_nr)['variables'] == {'name': 'Ben'}
+
+def test_required_option_must_show_window_again_on_invalid_option():
+    sessio_nr = random.randint(1000000, 9999999)
+    cell_nr = '258842217064'
+    app, session_manager = create_required_app('LANGUAGE', sessio_nr, cell_nr)
+
+    window = app.process_request(create_request(session_nr=sessio_nr, cell_nr=cell_nr, request_str="3"))
+
+    assert window['name'] == 'LANGUAGE'
+    assert window['message'] == 'Please select a valid option'
+    assert session_manager.get(sessio_nr, cell_nr)['variables'] == {}
+    assert required_windows['LANGUAGE']['message'] == 'Please select your languange of choice'
+
+def test_required_without_window_must_return_error_window():
+    sessio_nr = random.randint(1000000, 9999999)
+    cell_nr = '258842217064'
+    app, session_manager = create_required_app('BROKEN', sessio_nr, cell_nr)
+
+    window = app.process_request(create_request(session_nr=sessio_nr, cell_nr=cell_nr, request_str="1"))
+
+    assert window['name'] == 'ERROR'
+    assert window['message'] == 'Error processing your request'
+
+def test_subclass_overrides_must_be_used():
+    class WordsLottus(Lottus):
+        def get_selected_option(self, window, request_str):
+            return super().get_selected_option(window, {'one': '1', 'two': '2'}.get(request_str, request_str))
+
+        def _process_required_input(self, view, session, request, session_nr, request_str):
+            return super()._process_required_input(view, session, request, session_nr, request_str.upper())
+
+    sessio_nr = random.randint(1000000, 9999999)
+    cell_nr = '258842217064'
+    app, session_manager = create_required_app('LANGUAGE', sessio_nr, cell_nr)
+    app = WordsLottus('LANGUAGE', required_windows, session_manager)
+
+    window = app.process_request(create_request(session_nr=sessio_nr, cell_nr=cell_nr, request_str="two"))
+
+    assert window['name'] == 'NAME'
+
+    app.process_request(create_request(session_nr=sessio_nr, cell_nr=cell_nr, request_str="ben"))
+
+    assert session_manager.get(sessio_nr, cell_nr)['variables'] == {'language': '2', 'name': 'BEN'}